@@ -1,6 +1,7 @@
 import logging
 import os
 import sqlite3
+import threading
 from typing import Iterator, Iterable
 
 import MySQLdb
@@ -9,8 +10,10 @@ import yaml
 
 import sqldb_schema
 from generic import AttrDict, OrderedAttrDict
+from sqldb_buffer import WriteBehindBuffer, PendingWrite
 from sqldb_dumpers import DUMPERS, dump_file_fmt, Dumper
 from sqldb_schema import TableSchema, get_table_schemas, get_table_schema, table_keys_dict
+from sqldb_schema import table_columns, table_fulltext_columns
 from sqldb_schema import where_op_value, _quoted
 
 m_logger = logging.getLogger(__name__)
@@ -18,6 +21,41 @@ m_logger = logging.getLogger(__name__)
 m_conn = sqlite3.Connection('')
 m_db_path = ''
 m_table_columns = AttrDict()  # {tname: TableColumns()}
+m_conn_lock = threading.RLock()
+m_write_buffer = None  # WriteBehindBuffer, see buffer_writes()
+m_profile_changes = OrderedAttrDict()  # {pragma: (before, after)}, see apply_profile()
+m_maintenance = None  # (threading.Thread, threading.Event), see schedule_maintenance()
+m_last_maintenance = OrderedAttrDict()  # report of the last maintain()
+m_active_selects = 0  # _select() cursors still being read
+
+SQLITE_PROFILES = OrderedAttrDict(
+    ('durable', OrderedAttrDict(
+        ('auto_vacuum', 'INCREMENTAL'),  # effective on a new Db, or after maintain(vacuum=True)
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'FULL'),
+        ('cache_size', -16000),  # KiB
+        ('mmap_size', 0),
+        ('temp_store', 'DEFAULT'),
+        ('busy_timeout', 5000),  # ms
+    )),
+    ('balanced', OrderedAttrDict(
+        ('auto_vacuum', 'INCREMENTAL'),
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('cache_size', -64000),
+        ('mmap_size', 256 * 1024 * 1024),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', 5000),
+    )),
+    ('bulk-load', OrderedAttrDict(
+        ('journal_mode', 'MEMORY'),
+        ('synchronous', 'OFF'),
+        ('cache_size', -256000),
+        ('mmap_size', 1024 * 1024 * 1024),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', 30000),
+    )),
+)
 
 
 def name() -> str:
@@ -49,15 +87,27 @@ class TableColumns(object):
         return (col[index] for col in self._cols)
 
 
-def connect(name: str, driver: str = '', username: str = '', password: str = ''):
+def connect(name: str, driver: str = '', username: str = '', password: str = '', profile: str = ''):
     global m_conn
     global m_db_path
+    global m_profile_changes
+
+    m_profile_changes = OrderedAttrDict()
+
+    if profile:
+        _profile_pragmas(profile)
 
     if not driver or driver == 'sqlite3':
         m_db_path = os.path.expanduser(name)
         m_conn = sqlite3.connect(m_db_path, check_same_thread=False)
         m_logger.info('connected to ' + m_db_path)
 
+        if profile:
+            apply_profile(profile)
+
+    elif profile:
+        raise KeyError(f'unsupported profile for driver: {driver}, only for: sqlite3')
+
     elif driver == 'MySQLdb':
         name, host = name.split('@', 1) if '@' in name else (name, 'localhost')
         m_conn = MySQLdb.connect(host=host, database=name, user=username, password=password, charset='utf8')
@@ -69,26 +119,159 @@ def connect(name: str, driver: str = '', username: str = '', password: str = '')
 
 def disconnect():
     global m_conn
+    global m_profile_changes
 
-    m_conn.commit()
-    m_conn.close()
-    m_logger.debug('closed connection: ' + repr(m_conn))
-    m_conn = sqlite3.Connection('')
+    try:
+        unschedule_maintenance()
+        unbuffer_writes()
+
+    finally:
+        m_conn.commit()
+        m_conn.close()
+        m_logger.debug('closed connection: ' + repr(m_conn))
+        m_conn = sqlite3.Connection('')
+        m_profile_changes = OrderedAttrDict()
 
 
 def init(name: str = '', driver: str = '', username: str = '', password: str = '',
-         drop: bool = False, verify: bool = True):
-    connect(name=name, driver=driver, username=username, password=password)
+         drop: bool = False, verify: bool = True, profile: str = ''):
+    connect(name=name, driver=driver, username=username, password=password, profile=profile)
 
     for tname, fields in get_table_schemas().items():
         if fields and drop:
             _drop_create_table(tname)
 
-        load_table_info(tname, verify=verify and not fields)
+        if load_table_info(tname, verify=verify and not fields) and fields and not drop:
+            _create_fulltext_index(tname)
 
     m_logger.debug(yaml.dump(get_table_schemas(), default_flow_style=True, width=999))
 
 
+def apply_profile(profile: str) -> OrderedAttrDict:  # {pragma: (before, after)}
+    global m_profile_changes
+
+    pragmas = _profile_pragmas(profile)
+
+    if _driver() != 'sqlite3':
+        raise KeyError(f'unsupported profile for driver: {_driver()}, only for: sqlite3')
+
+    changes = OrderedAttrDict()
+
+    with m_conn_lock:
+        m_conn.commit()
+        cursor = m_conn.cursor()
+
+        for pragma, value in pragmas.items():
+            before = cursor.execute(f'PRAGMA {pragma}').fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}').fetchall()
+            after = cursor.execute(f'PRAGMA {pragma}').fetchone()[0]
+
+            if after != before:
+                changes[pragma] = (before, after)
+
+    m_profile_changes = changes
+    m_logger.info(f'applied profile {profile}: ' +
+                  (', '.join(f'{k} {v[0]} -> {v[1]}' for k, v in changes.items()) or 'no changes'))
+
+    return changes
+
+
+def _profile_pragmas(profile: str) -> OrderedAttrDict:
+    if profile not in SQLITE_PROFILES:
+        raise KeyError(f'unsupported profile: {profile}, only one of: ' + ', '.join(SQLITE_PROFILES.keys()))
+
+    return SQLITE_PROFILES[profile]
+
+
+def profile_changes() -> OrderedAttrDict:  # {pragma: (before, after)}
+    return m_profile_changes
+
+
+def maintain(analyze: bool = False, vacuum_pages: int = 0, vacuum: bool = False) -> OrderedAttrDict:
+    global m_last_maintenance
+
+    report = OrderedAttrDict()
+
+    with m_conn_lock:
+        m_conn.commit()
+        cursor = m_conn.cursor()
+
+        if _driver() == 'sqlite3':
+            if analyze:
+                cursor.execute('ANALYZE')
+                report.analyze = True
+
+            cursor.execute('PRAGMA optimize').fetchall()
+            report.optimize = True
+
+            if m_active_selects:  # checkpoint & vacuum fail while statements are in progress
+                report.vacuum = False
+                m_logger.warning(f'skipped checkpoint & vacuum, {m_active_selects} selects still being read')
+
+            elif vacuum:
+                cursor.execute('VACUUM')
+                report.vacuum = True
+                report.rebuild_fulltext = rebuild_fulltext_indexes()
+
+            elif cursor.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:  # INCREMENTAL
+                free = cursor.execute('PRAGMA freelist_count').fetchone()[0]
+                cursor.execute(f'PRAGMA incremental_vacuum({vacuum_pages})').fetchall()
+                report.incremental_vacuum = free - cursor.execute('PRAGMA freelist_count').fetchone()[0]
+
+            if not m_active_selects and cursor.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+                report.wal_checkpoint = cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+
+        elif _driver() == '_mysql':
+            for tname in get_table_schemas().keys():
+                cursor.execute(f'ANALYZE TABLE {tname}')
+                cursor.fetchall()
+
+            report.analyze = True
+
+        else:
+            raise TypeError(f'unsupported Db driver: {_driver()}')
+
+        m_conn.commit()
+
+    m_last_maintenance = report
+    m_logger.info('maintained: ' + ', '.join(f'{k}={v}' for k, v in report.items()))
+
+    return report
+
+
+def last_maintenance() -> OrderedAttrDict:
+    return m_last_maintenance
+
+
+def schedule_maintenance(interval: float = 3600, **kwargs):
+    global m_maintenance
+
+    unschedule_maintenance()
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                maintain(**kwargs)
+
+            except Exception:
+                m_logger.exception('failed scheduled maintenance')
+
+    thread = threading.Thread(target=run, name='sqldb-maintenance', daemon=True)
+    thread.start()
+    m_maintenance = (thread, stop)
+
+
+def unschedule_maintenance():
+    global m_maintenance
+
+    if m_maintenance is not None:
+        thread, stop = m_maintenance
+        m_maintenance = None
+        stop.set()
+        thread.join()
+
+
 def fini():
     for tname in get_table_schemas().keys():
         if tname in m_table_columns:
@@ -99,7 +282,7 @@ def fini():
 
 def load_table_info(tname: str, verify: bool = True):
     if tname not in m_table_columns:
-        driver = str(m_conn).split('.')[0][1:]
+        driver = _driver()
 
         if driver == 'sqlite3':
             cols = m_conn.cursor().execute(f'PRAGMA table_info("{tname}")').fetchall()
@@ -151,6 +334,10 @@ def load_table_info(tname: str, verify: bool = True):
     return m_table_columns[tname]
 
 
+def _driver() -> str:
+    return str(m_conn).split('.')[0][1:]
+
+
 def _mysql_types_to_sqlite3(col: tuple) -> tuple:
     _col = list(col)
 
@@ -169,12 +356,167 @@ def _mysql_types_to_sqlite3(col: tuple) -> tuple:
 def _drop_create_table(tname):
     cursor = m_conn.cursor()
     cursor.execute('DROP TABLE IF EXISTS ' + tname)
+
+    if _driver() == 'sqlite3':
+        cursor.execute(f'DROP TABLE IF EXISTS {tname}_fts')
+
     cursor.execute('CREATE TABLE {} ({})'.format(tname, str(get_table_schema(tname))))
+    _create_fulltext_index(tname)
     m_logger.info('initialized table: ' + tname)
 
 
+def _create_fulltext_index(tname):
+    cols = table_fulltext_columns(tname)
+
+    if not cols:
+        return
+
+    fts = f'{tname}_fts'
+    cursor = m_conn.cursor()
+
+    if _driver() == 'sqlite3':
+        cursor.execute(f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{fts}'")
+
+        if cursor.fetchone():
+            return
+
+        new_cols = ', '.join(f'new.{c}' for c in cols)
+        old_cols = ', '.join(f'old.{c}' for c in cols)
+        insert_new = f"INSERT INTO {fts} (rowid, {','.join(cols)}) VALUES (new.rowid, {new_cols});"
+        delete_old = f"INSERT INTO {fts} ({fts}, rowid, {','.join(cols)}) VALUES ('delete', old.rowid, {old_cols});"
+
+        cursor.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({','.join(cols)}, "
+                       f"content='{tname}', content_rowid='rowid')")
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tname} BEGIN {insert_new} END')
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tname} BEGIN {delete_old} END')
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {','.join(cols)} ON {tname} "
+                       f'BEGIN {delete_old} {insert_new} END')
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+    elif _driver() == '_mysql':
+        cursor.execute(f"SHOW INDEX FROM {tname} WHERE Key_name = '{fts}'")
+
+        if cursor.fetchone():
+            return
+
+        cursor.execute(f"ALTER TABLE {tname} ADD FULLTEXT INDEX {fts} ({','.join(cols)})")
+
+    else:
+        raise TypeError(f'unsupported Db driver: {_driver()}')
+
+    m_conn.commit()
+    m_logger.info(f'initialized full-text index: {fts} ({",".join(cols)})')
+
+
+def buffer_writes(batch_size: int = 500, flush_interval: float = 1.0, max_pending: int = 10000) -> WriteBehindBuffer:
+    global m_write_buffer
+
+    if m_write_buffer is None:
+        m_write_buffer = WriteBehindBuffer(_apply_pending, batch_size=batch_size,
+                                           flush_interval=flush_interval, max_pending=max_pending)
+
+    return m_write_buffer
+
+
+def flush():
+    if m_write_buffer is not None:
+        m_write_buffer.flush()
+
+
+def unbuffer_writes():
+    global m_write_buffer
+
+    if m_write_buffer is not None:
+        try:
+            m_write_buffer.close()
+
+        except Exception:
+            for entry in m_write_buffer.discard():
+                m_logger.error(f'lost pending write: {entry!r}')
+
+            raise
+
+        finally:
+            m_write_buffer = None
+
+
+def _buffered_keys(table, record: dict, exact: bool = False) -> dict:
+    if m_write_buffer is None or m_write_buffer.applying():
+        return {}
+
+    try:
+        keys = table_keys_dict(table, record)
+
+    except KeyError:
+        keys = {}
+
+    if not keys or (exact and (set(keys) != set(record) or not _equality_keys(keys))):
+        _flush_pending()
+        keys = {}
+
+    return keys
+
+
+def _flush_pending():
+    if m_write_buffer is not None and not m_write_buffer.applying():
+        m_write_buffer.flush()
+
+
+def _equality_keys(keys: dict) -> bool:
+    return not any(isinstance(v, (tuple, list)) or (isinstance(v, str) and (v[:1] in ('>', '<') or '%' in v))
+                   for v in keys.values())
+
+
+def _pending(table, record: dict) -> PendingWrite:
+    if m_write_buffer is None or m_write_buffer.applying():
+        return None
+
+    try:
+        keys = table_keys_dict(table, record)
+
+    except KeyError:
+        return None
+
+    return m_write_buffer.get(table, keys) if set(keys) == set(record) and _equality_keys(keys) else None
+
+
+def _apply_pending(batch: [PendingWrite]):
+    with m_conn_lock:
+        try:
+            for entry in batch:
+                if entry.delete:
+                    delete(entry.table, lenient=True, **entry.keys)
+
+                if entry.op == 'create':
+                    create(entry.table, lenient=True, **entry.kwargs)
+
+                elif entry.op == 'write':
+                    write(entry.table, **entry.kwargs)
+
+            m_conn.commit()
+
+        except Exception:
+            m_conn.rollback()
+            raise
+
+
+def _execute(sql) -> int:
+    with m_conn_lock:
+        cursor = m_conn.cursor()
+        cursor.execute(sql)
+        _commit()
+
+    return cursor.rowcount
+
+
+def _commit():
+    if m_write_buffer is None or not m_write_buffer.applying():
+        m_conn.commit()
+
+
 def create(table, lenient=False, **kwargs) -> TableSchema:
     schema = get_table_schema(table)
+    buffered = _buffered_keys(table, kwargs)
 
     if not lenient:
         try:
@@ -185,11 +527,16 @@ def create(table, lenient=False, **kwargs) -> TableSchema:
             pass
 
     record = schema.new(**kwargs)
+
+    if buffered:
+        m_write_buffer.put(table, buffered, 'create', **kwargs)
+        m_logger.debug(f'buffered create at {table} {repr(record)}')
+
+        return record
+
     sql = 'INSERT INTO {} ({}) VALUES ({})'.format(table, *record.for_insert())
     m_logger.debug(sql)
-    cursor = m_conn.cursor()
-    cursor.execute(sql)
-    m_conn.commit()
+    _execute(sql)
     m_logger.info(f'created at {table} {repr(record)}')
 
     return record
@@ -198,6 +545,16 @@ def create(table, lenient=False, **kwargs) -> TableSchema:
 def update(table, **kwargs):
     schema = get_table_schema(table)
     keys = table_keys_dict(table, kwargs, schema)
+    pending = _pending(table, keys)
+
+    if pending:
+        if not pending.exists:
+            raise NameError(f"table {table} is missing {keys}")
+
+        m_write_buffer.put(table, keys, 'update', **kwargs)
+        m_logger.debug(f'buffered update at {table} {kwargs}')
+
+        return
 
     if not existing(table, **keys):
         raise NameError(f"table {table} is missing {keys}")
@@ -207,13 +564,48 @@ def update(table, **kwargs):
     _set = record.for_update(**kwargs)
 
     sql = f'UPDATE {table} SET {_set} WHERE {where}'
-    cursor = m_conn.cursor()
-    cursor.execute(sql)
-    m_conn.commit()
+    _execute(sql)
     m_logger.debug(f'updated at {table} {sql}')
 
 
+def update_where(table, set: dict, **where) -> int:  # updated rows
+    assert set, f'expected columns to set at {table}'
+    schema = get_table_schema(table)
+    _set = schema.new(**set).for_update(**set)
+    sql = f'UPDATE {table} SET {_set}'
+
+    if where:
+        sql += ' WHERE ' + schema.new(**where).for_where(**where)
+
+    _flush_pending()
+    count = _execute(sql)
+    m_logger.debug(f'updated {count} at {table} {sql}')
+
+    return count
+
+
 def read(table, **kv) -> TableSchema:
+    pending = _pending(table, kv)
+
+    if pending:
+        if not pending.exists:
+            raise NameError('missing from {}: {}={} (pending delete)'.format(table, *list(kv.items())[0]))
+
+        if pending.delete or pending.op == 'create':
+            return get_table_schema(table).new(**pending.kwargs)
+
+        try:
+            stored = _read(table, **kv)
+
+        except NameError:
+            return get_table_schema(table).new(**pending.kwargs)
+
+        return get_table_schema(table).new(**dict(stored, **pending.kwargs))
+
+    return _read(table, **kv)
+
+
+def _read(table, **kv) -> TableSchema:
     where = get_table_schema(table).new(**kv).for_where(**kv)
     sql = f"SELECT * FROM {table} WHERE {where}"
     m_logger.debug('reading: ' + sql)
@@ -231,6 +623,13 @@ def read(table, **kv) -> TableSchema:
 
 
 def existing(table, by_schema=True, **where) -> bool:
+    pending = _pending(table, where) if by_schema else None
+
+    if pending:
+        m_logger.debug(f"{table} {where} {'does' if pending.exists else 'does not'} exist, pending write")
+
+        return pending.exists
+
     if by_schema:
         by_schema = get_table_schema(table)
         where_sql = by_schema.new(**where).for_where(**where)
@@ -262,6 +661,14 @@ def existing(table, by_schema=True, **where) -> bool:
 
 
 def write(table, **kwargs):
+    keys = _buffered_keys(table, kwargs)
+
+    if keys:
+        m_write_buffer.put(table, keys, 'write', **kwargs)
+        m_logger.debug(f'buffered write at {table} {kwargs}')
+
+        return
+
     try:
         update(table, **kwargs)
 
@@ -276,7 +683,7 @@ def write(table, **kwargs):
         create(table, **kwargs)
 
 
-def delete(table, lenient=False, by_schema=True, **where):
+def delete(table, lenient=False, by_schema=True, **where) -> int:  # deleted rows, 0 when buffered
     if by_schema:
         by_schema = get_table_schema(table)
         for_where = by_schema.new(**where).for_where(**where)
@@ -284,18 +691,72 @@ def delete(table, lenient=False, by_schema=True, **where):
     else:
         for_where = ' '.join(f"{k}={_quoted(v)}" for k, v in where.items())
 
+    keys = _buffered_keys(table, where if by_schema and lenient else {}, exact=True)
     sql = f'DELETE FROM {table}'
 
-    if not lenient and where:
-        assert existing(table, **where), f"table {table} is missing {for_where}"
+    if keys:
+        m_write_buffer.put(table, keys, 'delete')
+        m_logger.debug(f'buffered delete at {table} {keys}')
+
+        return 0
 
     if where:
         sql += ' WHERE ' + for_where
 
-    cursor = m_conn.cursor()
-    cursor.execute(sql)
-    m_conn.commit()
-    m_logger.debug('Done ' + sql)
+    count = _execute(sql)
+    m_logger.debug(f'Done {sql}, deleted {count}')
+    assert lenient or not where or count, f"table {table} is missing {for_where}"
+
+    return count
+
+
+def rebuild_fulltext_indexes() -> [str]:  # after VACUUM, which renumbers the rowids FTS5 refers to
+    rebuilt = []
+
+    if _driver() == 'sqlite3':
+        with m_conn_lock:
+            cursor = m_conn.cursor()
+
+            for tname in get_table_schemas().keys():
+                if table_fulltext_columns(tname):
+                    cursor.execute(f"INSERT INTO {tname}_fts ({tname}_fts) VALUES ('rebuild')")
+                    rebuilt.append(f'{tname}_fts')
+
+            m_conn.commit()
+
+    m_logger.info('rebuilt full-text indexes: ' + ', '.join(rebuilt))
+
+    return rebuilt
+
+
+def search(table, query: str, raw: bool = False, **where) -> Iterator:  # (TableSchema, ) best match first
+    cols = table_fulltext_columns(table)
+    assert cols, f'table {table} has no __fulltext__ columns'
+
+    if _driver() == 'sqlite3' and not raw:  # match each term as an FTS5 string, else FTS5 query syntax
+        query = ' '.join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+
+    if not query.strip():
+        return iter(())
+
+    query = "'{}'".format(query.replace("'", "''"))
+
+    if _driver() == 'sqlite3':
+        sql = (f'WITH hits AS (SELECT rowid AS hit, rank AS hit_rank FROM {table}_fts WHERE {table}_fts MATCH {query}) '
+               f'SELECT {table}.* FROM {table} JOIN hits ON {table}.rowid = hits.hit WHERE 1')
+        order_by = ' ORDER BY hits.hit_rank'
+
+    else:
+        match = f"MATCH({','.join(cols)}) AGAINST({query} IN NATURAL LANGUAGE MODE)"
+        sql = f'SELECT * FROM {table} WHERE {match}'
+        order_by = f' ORDER BY {match} DESC'
+
+    if where:
+        sql += ' AND ' + get_table_schema(table).new(**where).for_where(**where)
+
+    _flush_pending()
+
+    return (_new_schema(table, row) for row in _select(sql + order_by))
 
 
 def list_table(table, **where) -> Iterator:
@@ -322,45 +783,58 @@ def select(table: str, *columns, by_schema=True, **where) -> Iterable:  # yield
             sql += ' '.join(f"{k}={_quoted(v)}" for k, v in where.items())
 
     sql += order_by
+    _flush_pending()
 
     for row in _select(sql):
         yield row
 
 
 def _select(sql) -> Iterable:  # yield row
+    global m_active_selects
+
     m_logger.debug(sql)
-    m_conn.commit()
-    cursor = m_conn.cursor()
 
-    try:
-        cursor.execute(sql)
+    with m_conn_lock:
+        _commit()
+        cursor = m_conn.cursor()
 
-    except Exception as exc:
-        raise type(exc)(str(exc) + f' "{sql}"')
+        try:
+            cursor.execute(sql)
 
-    row = cursor.fetchone()
+        except Exception as exc:
+            raise type(exc)(str(exc) + f' "{sql}"')
 
-    while row:
-        yield row
+        m_active_selects += 1
 
+    try:
         row = cursor.fetchone()
 
+        while row:
+            yield row
+
+            row = cursor.fetchone()
+
+    finally:
+        with m_conn_lock:
+            m_active_selects -= 1
+
 
 def select_join(left: str, right: str, on: str) -> Iterable:  # yield row
     sql = 'SELECT * FROM ' + left + ' LEFT JOIN ' + right + ' ON ' + '{}.{} = {}.{}'.format(left, on, right, on)
+    _flush_pending()
 
     for row in _select(sql):
         yield row
 
 
 def select_objects(table: str, *columns, **where) -> Iterable:  # (OrderedAttrDict, )
-    return (OrderedAttrDict(zip(list(f for f in get_table_schema(table).keys() if not columns or f in columns), row))
+    return (OrderedAttrDict(zip(list(f for f in table_columns(table) if not columns or f in columns), row))
             for row in select(table, *columns, **where))
 
 
 def select_join_objects(left: str, right: str, on: str) -> Iterable:  # (OrderedAttrDict, )
     return (
-        OrderedAttrDict(zip(list(get_table_schema(left).keys())[:-1] + list(get_table_schema(right).keys())[:-1], row))
+        OrderedAttrDict(zip(table_columns(left) + table_columns(right), row))
         for row in select_join(left, right, on)
     )
 
@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from sqldb_schema import _empty
+
+m_logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3  # failed batch attempts, before applying its records one by one, dropping failing ones
+MAX_BACKOFF = 64  # times flush_interval, to wait after consecutive failures
+
+
+class PendingWrite(object):  # coalesced record: optional delete, then create / write of the latest kwargs
+
+    def __init__(self, table: str, keys: dict):
+        self.table = table
+        self.keys = keys
+        self.delete = False
+        self.op = ''
+        self.kwargs = {}
+        self.attempts = 0
+
+    def __repr__(self):
+        return f"{self.table} {self.keys} delete={self.delete} op={self.op or None} {self.kwargs}"
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.op)
+
+    def coalesce(self, op: str, **kwargs):
+        if op == 'delete':
+            self.delete, self.op, self.kwargs = True, '', {}
+
+        elif op == 'create':
+            self.op, self.kwargs = 'create', kwargs
+
+        else:
+            self.op = self.op or 'write'
+            self.kwargs = dict(self.kwargs, **kwargs)
+
+    def coalesce_newer(self, newer):
+        if newer.delete:
+            self.coalesce('delete')
+
+        if newer.op:
+            self.coalesce(newer.op, **newer.kwargs)
+
+
+class WriteBehindBuffer(object):
+
+    def __init__(self, apply: Callable, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 10000):
+        assert 0 < batch_size <= max_pending, f'expected 0 < batch_size <= max_pending, got {batch_size}, {max_pending}'
+
+        self._apply = apply
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._pending = OrderedDict()  # {(table, key values): PendingWrite}
+        self._cond = threading.Condition()
+        self._apply_lock = threading.Lock()
+        self._applying = None  # ident of the thread applying a batch
+        self._error = None
+        self._failures = 0  # consecutive failed drains
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='sqldb-write-behind', daemon=True)
+        self._thread.start()
+        m_logger.debug(f'started write-behind buffer: batch_size={batch_size}, '
+                       f'flush_interval={flush_interval}, max_pending={max_pending}')
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def applying(self) -> bool:
+        return self._applying == threading.get_ident()
+
+    def put(self, table: str, keys: dict, op: str, **kwargs):
+        with self._cond:
+            self._raise_error()
+            assert not self._closed, 'write-behind buffer is closed'
+            key = _key(table, keys)
+
+            while key not in self._pending and len(self._pending) >= self._max_pending:
+                self._cond.notify_all()
+                self._cond.wait()
+                self._raise_error()
+                assert not self._closed, 'write-behind buffer is closed'
+
+            self._pending.setdefault(key, PendingWrite(table, keys)).coalesce(op, **kwargs)
+
+            if len(self._pending) >= self._batch_size:
+                self._cond.notify_all()
+
+    def get(self, table: str, keys: dict) -> PendingWrite:
+        # waits for a batch being applied to commit first
+        with self._apply_lock, self._cond:
+            return self._pending.get(_key(table, keys))
+
+    def flush(self):
+        with self._apply_lock:
+            while self._drain():
+                pass
+
+        with self._cond:
+            self._raise_error()
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+
+            self._closed = True
+            self._cond.notify_all()
+
+        self._thread.join()
+        self.flush()
+        m_logger.debug('closed write-behind buffer')
+
+    def discard(self) -> [PendingWrite]:
+        with self._cond:
+            discarded, self._pending = list(self._pending.values()), OrderedDict()
+            self._cond.notify_all()
+
+        return discarded
+
+    def _run(self):
+        deadline = time.monotonic() + self._flush_interval
+
+        while True:
+            with self._cond:
+                while not self._closed and time.monotonic() < deadline and \
+                        (self._failures or len(self._pending) < self._batch_size):
+                    self._cond.wait(deadline - time.monotonic())
+
+                if self._closed:
+                    return
+
+            with self._apply_lock:
+                try:
+                    self._drain()
+
+                except Exception as exc:
+                    m_logger.exception('failed write-behind flush')
+
+                    with self._cond:
+                        self._error = exc
+
+            backoff = min(2 ** self._failures, MAX_BACKOFF) if self._failures else 1
+            deadline = time.monotonic() + self._flush_interval * backoff
+
+    def _drain(self) -> int:
+        with self._cond:
+            batch = OrderedDict()
+
+            while self._pending and len(batch) < self._batch_size:
+                key, entry = self._pending.popitem(last=False)
+                batch[key] = entry
+
+            self._cond.notify_all()
+
+        if batch:
+            self._applying = threading.get_ident()
+
+            try:
+                if max(entry.attempts for entry in batch.values()) >= MAX_ATTEMPTS:
+                    self._apply_one_by_one(batch)
+
+                else:
+                    self._apply(list(batch.values()))
+
+            except Exception:
+                self._failures += 1
+
+                for entry in batch.values():
+                    entry.attempts += 1
+
+                self._restore(batch)
+                raise
+
+            finally:
+                self._applying = None
+
+            self._failures = 0
+            m_logger.debug(f'flushed {len(batch)} pending writes')
+
+        return len(batch)
+
+    def _apply_one_by_one(self, batch: OrderedDict):
+        for entry in batch.values():
+            try:
+                self._apply([entry])
+
+            except Exception as exc:
+                m_logger.error(f'dropped pending write after {entry.attempts} failed attempts: {entry!r}: {exc}')
+
+                with self._cond:
+                    self._error = exc
+
+    def _restore(self, batch: OrderedDict):
+        # failed batch goes back ahead of the newer pending writes, coalesced on top of it
+        with self._cond:
+            for key, newer in self._pending.items():
+                if key in batch:
+                    batch[key].coalesce_newer(newer)
+
+                else:
+                    batch[key] = newer
+
+            self._pending = batch
+
+    def _raise_error(self):
+        if self._error is not None:
+            exc, self._error = self._error, None
+            raise exc
+
+
+def _key(table: str, keys: dict) -> tuple:
+    return table, tuple(_empty(v) for v in keys.values())
@@ -4,17 +4,17 @@ from generic import OrderedAttrDict
 class TableSchema(OrderedAttrDict):
 
     def __str__(self):
-        return ','.join(f"{k} {v}" for k, v in self.items() if k != '__key__')
+        return ','.join(f"{k} {v}" for k, v in self.items() if k not in META_KEYS)
 
     def __repr__(self):
         if '__key__' in self:
-            keys = self.__key__.split(',') + ['__key__']
+            keys = self.__key__.split(',') + list(META_KEYS)
 
             return ', '.join(f"{k}: {self[k]}" for k in self.__key__.split(',')) + ', ' + \
                    ', '.join(f"{k}: {v}" for k, v in self.items() if k not in keys and v)
 
         else:
-            return ', '.join(': '.join([k, v]) for k, v in self.items() if v)
+            return ', '.join(': '.join([k, v]) for k, v in self.items() if v and k not in META_KEYS)
 
     def new(self, **kwargs):
         result = TableSchema((k, PYTYPES[v]() if v in PYTYPES else v) for k, v in self.items())
@@ -22,16 +22,16 @@ class TableSchema(OrderedAttrDict):
         return result
 
     def for_insert(self):
-        cols, vals = zip(*[(k, _quoted(v)) for k, v in self.items() if k != '__key__'])
+        cols, vals = zip(*[(k, _quoted(v)) for k, v in self.items() if k not in META_KEYS])
         return ','.join(cols), ','.join(vals)
 
     def for_update(self, **kwargs):
-        return ', '.join(' = '.join([k, _quoted(v)]) for k, v in self.items() if (v or k in kwargs) and k != '__key__')
+        return ', '.join(' = '.join([k, _quoted(v)]) for k, v in self.items() if (v or k in kwargs) and k not in META_KEYS)
 
     def for_where(self, **kwargs):
         return ' AND '.join(f'{k}{where_op_value(v)}'
                             for k, v in self.items()
-                            if (v or k in kwargs) and k != '__key__')
+                            if (v or k in kwargs) and k not in META_KEYS)
 
 
 def where_op_value(value) -> str:
@@ -65,6 +65,8 @@ def _empty(val):
     return '' if val is None else (val if isinstance(val, (tuple, list)) else str(val))
 
 
+META_KEYS = ('__key__', '__fulltext__')
+
 PYTYPES = dict(
     INT=int,
     TEXT=str,
@@ -94,3 +96,15 @@ def table_keys_dict(table: str, record: dict, schema: OrderedAttrDict = None) ->
     schema = schema or get_table_schema(table)
 
     return dict((key, record[key]) for key in schema.__key__.split(','))
+
+
+def table_columns(table: str, schema: OrderedAttrDict = None) -> list:
+    schema = schema or get_table_schema(table)
+
+    return [k for k in schema.keys() if k not in META_KEYS]
+
+
+def table_fulltext_columns(table: str, schema: OrderedAttrDict = None) -> list:
+    schema = schema or get_table_schema(table)
+
+    return schema['__fulltext__'].split(',') if '__fulltext__' in schema else []
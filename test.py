@@ -1,11 +1,16 @@
 import logging
+import os
+import sqlite3
+import time
 
 logging.basicConfig(
     level=logging.DEBUG,
     format='%(asctime)s %(levelname).1s: %(message)s  <%(filename)s:%(lineno)d>',
 )
 
+import sqldb
 from sqldb import *
+from sqldb_buffer import *
 from sqldb_schema import *
 
 if __name__ == '__main__':
@@ -28,6 +33,13 @@ if __name__ == '__main__':
             ('Field3', 'REAL'),
             ('__key__', 'Field1,Field2'),
         )),
+        ('Table4', TableSchema(
+            ('Field1', 'TEXT'),
+            ('Field2', 'INT'),
+            ('Field3', 'TEXT'),
+            ('__key__', 'Field1'),
+            ('__fulltext__', 'Field3'),
+        )),
     ))
 
     init(name='/tmp/test.db', drop=True)
@@ -75,7 +87,7 @@ if __name__ == '__main__':
     assert create('Table1', Field1='xyz', Field2=1, Field3=11.11)
     assert len(list(select('Table1', Field2=1))) == 2
 
-    assert len(dump('test.yaml', 'test.json', 'test.csv', cwd='/tmp')) == 3 * 3
+    assert len(dump('test.yaml', 'test.json', 'test.csv', cwd='/tmp')) == 3 * 4
 
     assert create('Table2', Field1='hjf', Field3=0.5)
     assert create('Table2', Field1='lmn', Field3=11.11)
@@ -90,4 +102,195 @@ if __name__ == '__main__':
     assert read('Table3', Field1='hij', Field2=2).Field3 == '3.3'
     assert len(list(select('Table3', Field1='hij'))) == 2
 
+    assert update_where('Table3', set=dict(Field3=4.4), Field1='hij', Field2='>0') == 2
+    assert all(row[2] == 4.4 for row in select('Table3', Field1='hij'))
+    assert update_where('Table3', set=dict(Field3=5.5), Field2=[2, 3]) == 1
+    assert read('Table3', Field1='hij', Field2=2).Field3 == '5.5'
+    assert create('Table3', Field1='tmp', Field2=1)
+    assert create('Table3', Field1='tmp', Field2=2)
+    assert delete('Table3', Field1='tm%') == 2
+    assert delete('Table3', lenient=True, Field1='tmp') == 0
+
+    try:
+        delete('Table3', Field1='tmp')
+
+    except AssertionError as exc:
+        if 'missing' not in str(exc):
+            raise
+
+    assert create('Table4', Field1='a', Field2=1, Field3='the quick brown fox')
+    assert create('Table4', Field1='b', Field2=2, Field3='a lazy dog, a lazy fox, a lazy cat')
+    assert create('Table4', Field1='c', Field2=3, Field3='no match here, lazy')
+    assert [r.Field1 for r in search('Table4', 'lazy')] == ['b', 'c']
+    assert [r.Field1 for r in search('Table4', 'fox', Field2='>1')] == ['b']
+    update('Table4', Field1='c', Field3='a fox after all')
+    delete('Table4', Field1='a')
+    assert sorted(r.Field1 for r in search('Table4', 'fox')) == ['b', 'c']
+    assert not list(search('Table4', 'quick'))
+    assert create('Table4', Field1='d', Field2=4, Field3='e-mail: don\'t "reply", foo.bar')
+    assert [r.Field1 for r in search('Table4', 'e-mail')] == ['d']
+    assert [r.Field1 for r in search('Table4', 'don\'t foo.bar "reply",')] == ['d']
+    assert [r.Field1 for r in search('Table4', 'lazy OR after', raw=True)] == ['b', 'c']
+    assert not list(search('Table4', ' '))
+    assert 'AFTER UPDATE OF Field3 ON' in sqldb.m_conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'Table4_fts_au'").fetchone()[0]
+    assert list(next(select_objects('Table4')).keys()) == ['Field1', 'Field2', 'Field3']
+
+    buffer_writes(batch_size=10, flush_interval=60)
+    write('Table1', Field1='buf', Field2=1, Field3=0.1)
+    write('Table1', Field1='buf', Field3=0.2)
+    assert read('Table1', Field1='buf').Field3 == '0.2'
+    assert existing('Table1', Field1='buf')
+    update('Table1', Field1='buf', Field2=3)
+    assert read('Table1', Field1='buf').Field2 == '3'
+    write('Table1', Field1='abc', Field2=5)
+    assert read('Table1', Field1='abc').Field2 == '5'
+    assert read('Table1', Field1='abc').Field3 == '1.5'
+    assert delete('Table1', Field1='xyz', lenient=True) == 0
+    assert existing('Table1', Field1='buf')
+    assert not existing('Table1', Field1='xyz')
+
+    try:
+        read('Table1', Field1='xyz')
+
+    except NameError as exc:
+        if 'missing' not in str(exc):
+            raise
+
+    flush()
+    assert read('Table1', Field1='buf').Field3 == '0.2'
+    assert not existing('Table1', Field1='xyz')
+
+    write('Table3', Field1='buf', Field2=1, Field3=1.0)
+    write('Table3', Field1='buf', Field2='1', Field3=2.0)
+    assert len(buffer_writes()) == 1
+    assert read('Table3', Field1='buf', Field2='1').Field3 == '2.0'
+
+    assert delete('Table3', Field1='buf', Field2=1) == 1
+    assert delete('Table3', lenient=True, Field1='buf', Field2=1) == 0
+
+    try:
+        delete('Table3', Field1='buf', Field2=1)
+
+    except AssertionError as exc:
+        if 'missing' not in str(exc):
+            raise
+
+    for op in ('op1', 'op2', 'op3'):
+        write('Table1', Field1=op, Field2=7)
+
+    assert delete('Table1', Field1=['op1', 'op2']) == 2
+    assert delete('Table1', Field1='op%') == 1
+    assert not existing('Table1', Field1='op3')
+
+    for i in range(25):
+        write('Table2', Field1=f'tel{i % 15}', Field2=i)
+
+    assert len(list(select('Table2', Field1='tel%'))) == 15
+    assert len(buffer_writes()) == 0
+    write('Table2', Field1='tel0', Field2=15)
+    unbuffer_writes()
+    assert read('Table2', Field1='tel0').Field2 == '15'
+
+    buffer_writes(flush_interval=60)
+    write('Table2', Field1='lost', Field2=1)
+    conn = sqldb.m_conn
+    conn.execute('DROP TABLE Table2')
+
+    try:
+        fini()
+
+    except sqlite3.OperationalError as exc:
+        if 'no such table' not in str(exc):
+            raise
+
+    assert sqldb.m_write_buffer is None
+
+    try:
+        conn.execute('SELECT 1')
+
+    except sqlite3.ProgrammingError as exc:
+        if 'closed' not in str(exc):
+            raise
+
+    applied = []
+
+    def apply(batch):
+        applied.append([entry.keys['k'] for entry in batch])
+
+        if any(entry.kwargs.get('bad') for entry in batch):
+            raise ValueError('bad record')
+
+    poisoned = WriteBehindBuffer(apply, batch_size=2, flush_interval=0.01)
+    poisoned.put('T', dict(k=1), 'write', bad=True)
+    poisoned.put('T', dict(k=2), 'write')
+    time.sleep(0.5)
+    assert len(poisoned) == 0
+    assert applied == [[1, 2]] * MAX_ATTEMPTS + [[1], [2]]
+
+    try:
+        poisoned.close()
+
+    except ValueError:
+        pass
+
+    failing = WriteBehindBuffer(lambda batch: 1 / 0, flush_interval=60)
+    failing.put('T', dict(k=1), 'write', k=1, v=1)
+
+    try:
+        failing.flush()
+
+    except ZeroDivisionError:
+        pass
+
+    failing.put('T', dict(k='1'), 'write', v=2)
+    assert len(failing) == 1 and failing.get('T', dict(k=1)).kwargs == dict(k=1, v=2)
+
+    try:
+        failing.close()
+
+    except ZeroDivisionError:
+        pass
+
+    for path in ('/tmp/test_profile.db', '/tmp/test_profile.db-wal', '/tmp/test_profile.db-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+
+    init(name='/tmp/test_profile.db', drop=True, profile='balanced')
+    assert profile_changes().journal_mode == ('delete', 'wal')
+    assert create('Table1', Field1='abc', Field2=1)
+    delete('Table1', Field1='abc')
+    report = maintain(analyze=True)
+    assert report.optimize and report.wal_checkpoint[0] == 0
+    assert 'incremental_vacuum' in report
+
+    for i in range(5):
+        assert create('Table4', Field1=f'v{i}', Field3=f'word{i}')
+
+    delete('Table4', Field1=['v0', 'v1'])
+    assert maintain(vacuum=True).rebuild_fulltext == ['Table4_fts']
+    assert [r.Field1 for r in search('Table4', 'word4')] == ['v4']
+    assert not list(search('Table4', 'word1'))
+
+    reading = select('Table4')
+    assert next(reading)
+    assert maintain(vacuum=True).vacuum is False
+    reading.close()
+    assert maintain(vacuum=True).vacuum is True
+    last = last_maintenance()
+    schedule_maintenance(interval=0.01)
+    deadline = time.monotonic() + 5
+
+    while last_maintenance() is last and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert last_maintenance() is not last and last_maintenance().optimize
     fini()
+    assert not profile_changes()
+
+    try:
+        init(name='/tmp/test_profile.db', profile='fastest')
+
+    except KeyError as exc:
+        if 'unsupported profile' not in str(exc):
+            raise